@@ -2,7 +2,10 @@
 generic Python utils
 """
 
+import functools
 
+
+@functools.lru_cache(maxsize=4096)
 def is_valid_python_identifier_name(name: str) -> bool:
     """
     :return: whether the name is a valid Python identifier name (including attrib name)
@@ -2,41 +2,44 @@ from i6_experiments.common.baselines.librispeech.ls100.gmm.baseline_config impor
 
 run_librispeech_100_common_baseline()
 
-jobs = [
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.1Vg6e2rru5zT",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.1zal8cm69WmP",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.3IUWNwZNXxRg",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.86R8MMZIwINK",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.8whLkL3w6voN",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.ANGjQ4Tjrh5D",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.ELrcwJOwR0PN",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.FawUhc2tE2tv",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.FeOwq6LOutch",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.JUazkB4OJVs6",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.KZeOsUa4ykgW",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.MCxhia2BgeQl",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.N7r9MCdQtpeG",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.OLwe8kLywiyq",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.RDaWITjdoyUJ",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.REuO87ENj8Q5",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.TSBTiBzDtFDa",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.XmbwmVNrrPQq",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.Z1x8J7IJTlDc",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.Zb5s0hL4Wg0R",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.a13Nkn9HvKQa",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.aK6XBTcPvKTc",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.akHBh9fmQoar",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.bVIOlYKQruEG",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.c0An6uOiK2Ii",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.lAcetacQGZ2d",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.lNJIdG96V8sa",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.nGn8eg0fCOFr",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.olpgByJPGE9P",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.otouEzNrztFw",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.p6sZQkid0MsC",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.qXEHYqJ6VCJs",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.s8vTvzcGuMi9",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.uUS7bmaJaaoM",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.vRYuDtbJWmKT",
-    "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob.wwB7m7gQ5U5M",
+_prefix = "work/i6_core/recognition/advanced_tree_search/AdvancedTreeSearchJob."
+_suffixes = [
+    "1Vg6e2rru5zT",
+    "1zal8cm69WmP",
+    "3IUWNwZNXxRg",
+    "86R8MMZIwINK",
+    "8whLkL3w6voN",
+    "ANGjQ4Tjrh5D",
+    "ELrcwJOwR0PN",
+    "FawUhc2tE2tv",
+    "FeOwq6LOutch",
+    "JUazkB4OJVs6",
+    "KZeOsUa4ykgW",
+    "MCxhia2BgeQl",
+    "N7r9MCdQtpeG",
+    "OLwe8kLywiyq",
+    "RDaWITjdoyUJ",
+    "REuO87ENj8Q5",
+    "TSBTiBzDtFDa",
+    "XmbwmVNrrPQq",
+    "Z1x8J7IJTlDc",
+    "Zb5s0hL4Wg0R",
+    "a13Nkn9HvKQa",
+    "aK6XBTcPvKTc",
+    "akHBh9fmQoar",
+    "bVIOlYKQruEG",
+    "c0An6uOiK2Ii",
+    "lAcetacQGZ2d",
+    "lNJIdG96V8sa",
+    "nGn8eg0fCOFr",
+    "olpgByJPGE9P",
+    "otouEzNrztFw",
+    "p6sZQkid0MsC",
+    "qXEHYqJ6VCJs",
+    "s8vTvzcGuMi9",
+    "uUS7bmaJaaoM",
+    "vRYuDtbJWmKT",
+    "wwB7m7gQ5U5M",
 ]
+
+jobs = [_prefix + suffix for suffix in _suffixes]
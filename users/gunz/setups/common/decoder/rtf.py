@@ -1,6 +1,7 @@
 __all__ = ["ExtractSearchStatisticsJob"]
 
 import collections
+from concurrent.futures import ThreadPoolExecutor
 import gzip
 import typing
 import xml.etree.ElementTree as ET
@@ -11,6 +12,30 @@ from sisyphus import tk, Job, Task
 Path = tk.setup_path(__package__)
 
 
+def _read_gzip(path: typing.Union[str, tk.Path]) -> str:
+    with gzip.open(tk.uncached_path(path), "rt") as f:
+        return f.read()
+
+
+def _read_gzip_files(
+    paths: typing.Iterable[typing.Union[str, tk.Path]], prefetch: int
+) -> typing.Iterator[str]:
+    """
+    Yields the decompressed contents of the files in order, while the next
+    `prefetch` files are read in the background.
+
+    Bounded so that only a few of the (large) logs are held in memory at once.
+    """
+    with ThreadPoolExecutor(max_workers=prefetch) as pool:
+        pending = collections.deque()
+        for path in paths:
+            pending.append(pool.submit(_read_gzip, path))
+            if len(pending) > prefetch:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
 class ExtractSearchStatisticsJob(Job):
     def __init__(
         self,
@@ -62,9 +87,9 @@ class ExtractSearchStatisticsJob(Job):
         seq_ss_statistics = {}
         eval_statistics = {}
 
-        for path in self.search_logs:
-            with gzip.open(tk.uncached_path(path), "rt") as f:
-                root = ET.fromstring(f.read())
+        # reading and decompressing the logs is I/O bound, overlap it with the parsing
+        for log in _read_gzip_files(self.search_logs, prefetch=4):
+            root = ET.fromstring(log)
             host = root.findall("./system-information/name")[0].text
             elapsed = float(root.findall("./timer/elapsed")[0].text)
             user = float(root.findall("./timer/user")[0].text)
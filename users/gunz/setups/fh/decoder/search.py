@@ -2,6 +2,8 @@ __all__ = ["DecodingTensorMap", "FHDecoder"]
 
 import copy
 from dataclasses import dataclass
+import functools
+from types import MappingProxyType
 import typing
 
 import i6_core.recognition as recog
@@ -14,8 +16,15 @@ from sisyphus.delayed_ops import Delayed
 
 from ...common.decoder.rtf import ExtractSearchStatisticsJob
 from ..factored import LabelInfo, PhoneticContext
+from ..in_graph_scorer import AddInGraphScorerJob
 from ..rust_scorer import RecompileTfGraphJob
-from .config import PosteriorScales, PriorInfo, SearchParameters
+from .config import (
+    default_posterior_scales,
+    Float,
+    PosteriorScales,
+    PriorInfo,
+    SearchParameters,
+)
 from .scorer import FactoredHybridFeatureScorer
 
 
@@ -68,8 +77,8 @@ class DecodingTensorMap(typing.TypedDict, total=False):
     """Tensor name of the softmax for the delta output."""
 
 
-def default_tensor_map() -> DecodingTensorMap:
-    return {
+_DEFAULT_TENSOR_MAP: typing.Mapping[str, str] = MappingProxyType(
+    {
         "in_classes": "extern_data/placeholders/classes/classes",
         "in_data": "extern_data/placeholders/data/data",
         "in_seq_length": "extern_data/placeholders/data/data_dim0_size",
@@ -82,6 +91,36 @@ def default_tensor_map() -> DecodingTensorMap:
         "out_center_state": "center-output/output_batch_major",
         "out_delta": "delta-ce/output_batch_major",
     }
+)
+
+
+def default_tensor_map() -> DecodingTensorMap:
+    return dict(_DEFAULT_TENSOR_MAP)
+
+
+_CENTER_OUT = ("center-state-posteriors", "out_center_state")
+_LEFT_OUT = ("left-context-posteriors", "out_left_context")
+_RIGHT_OUT = ("right-context-posteriors", "out_right_context")
+_DELTA_OUT = ("delta-posteriors", "out_delta")
+
+# feature scorer output map per context type, as ordered (param name, tensor map key)
+_FS_OUTPUT_MAPS: typing.Dict[
+    PhoneticContext, typing.Tuple[typing.Tuple[str, str], ...]
+] = {
+    PhoneticContext.monophone: (_CENTER_OUT,),
+    PhoneticContext.mono_state_transition: (_CENTER_OUT, _DELTA_OUT),
+    PhoneticContext.diphone: (_CENTER_OUT, _LEFT_OUT),
+    PhoneticContext.diphone_state_transition: (_CENTER_OUT, _LEFT_OUT, _DELTA_OUT),
+    PhoneticContext.triphone_symmetric: (_CENTER_OUT, _LEFT_OUT, _RIGHT_OUT),
+    PhoneticContext.triphone_forward: (_RIGHT_OUT, _CENTER_OUT, _LEFT_OUT),
+    PhoneticContext.tri_state_transition: (
+        _RIGHT_OUT,
+        _CENTER_OUT,
+        _LEFT_OUT,
+        _DELTA_OUT,
+    ),
+    PhoneticContext.triphone_backward: (_LEFT_OUT, _RIGHT_OUT, _CENTER_OUT),
+}
 
 
 @dataclass
@@ -156,6 +195,92 @@ def get_feature_scorer(
     )
 
 
+def _feature_scorer_arg_key(value: typing.Any) -> typing.Hashable:
+    if isinstance(value, PriorInfo):
+        priors = [
+            value.center_state_prior,
+            value.left_context_prior,
+            value.right_context_prior,
+        ]
+        return tuple(None if p is None else (p.file, p.scale) for p in priors)
+    if isinstance(value, dict):
+        return tuple(sorted(value.items()))
+    return value
+
+
+@dataclass(frozen=True)
+class RnnLmSpec:
+    """The model specific parts of a RASR tfrnn LM config."""
+
+    vocab_file: tk.Path
+    meta_graph_file: tk.Path
+    saved_model_file: rasr.StringWrapper
+    softmax_tensor_name: str = "output/output_batch_major"
+
+
+def get_rnn_lm_config(
+    spec: RnnLmSpec, native_lstm_path: typing.Union[str, tk.Path]
+) -> rasr.RasrConfig:
+    rnn_lm_config = rasr.RasrConfig()
+    rnn_lm_config.type = "tfrnn"
+    rnn_lm_config.vocab_file = spec.vocab_file
+    rnn_lm_config.transform_output_negate = True
+    rnn_lm_config.vocab_unknown_word = "<unk>"
+
+    rnn_lm_config.loader.type = "meta"
+    rnn_lm_config.loader.meta_graph_file = spec.meta_graph_file
+    rnn_lm_config.loader.saved_model_file = spec.saved_model_file
+    rnn_lm_config.loader.required_libraries = tk.Path(native_lstm_path)
+
+    input_info = rnn_lm_config.input_map.info_0
+    input_info.param_name = "word"
+    input_info.tensor_name = "extern_data/placeholders/delayed/delayed"
+    input_info.seq_length_tensor_name = (
+        "extern_data/placeholders/delayed/delayed_dim0_size"
+    )
+
+    output_info = rnn_lm_config.output_map.info_0
+    output_info.param_name = "softmax"
+    output_info.tensor_name = spec.softmax_tensor_name
+
+    return rnn_lm_config
+
+
+@functools.lru_cache(maxsize=None)
+def _get_requirements(
+    *,
+    gpu: bool,
+    context_type: PhoneticContext,
+    large_beam: bool,
+    is_lstm: bool,
+    is_eval: bool,
+) -> typing.Tuple[float, float]:
+    # under 27 is short queue
+    rtf = 15
+
+    if not gpu:
+        rtf *= 4
+
+    if context_type not in [
+        PhoneticContext.monophone,
+        PhoneticContext.diphone,
+    ]:
+        rtf += 5
+
+    if large_beam:
+        rtf += 10
+
+    if is_lstm:
+        rtf += 20
+        mem = 16.0
+        if is_eval:
+            rtf *= 2
+    else:
+        mem = 8
+
+    return rtf, mem
+
+
 def round2(num: float):
     return round(num, 2)
 
@@ -180,6 +305,9 @@ class FHDecoder:
         in_graph_acoustic_scoring=False,
     ):
         assert not (recompile_graph_for_feature_scorer and in_graph_acoustic_scoring)
+        assert (
+            not in_graph_acoustic_scoring or context_type.is_monophone()
+        ), "in-graph scoring needs a context independent center state prior"
 
         self.name = name
         self.search_crp = copy.deepcopy(search_crp)  # s.crp["dev_magic"]
@@ -191,9 +319,7 @@ class FHDecoder:
         self.tdp = {}
         self.silence_id = silence_id
 
-        self.tensor_map = default_tensor_map()
-        if tensor_map is not None:
-            self.tensor_map.update(tensor_map)
+        self.tensor_map = {**_DEFAULT_TENSOR_MAP, **(tensor_map or {})}
 
         self.eval_files = eval_files  # ctm file as ref
 
@@ -210,6 +336,8 @@ class FHDecoder:
         # LM attributes
         self.tfrnn_lms = {}
 
+        self._feature_scorer_cache = {}
+
         # setting other attributes
         self.set_tf_fs_flow(feature_path, model_path, graph)
         self.set_fs_tf_config()
@@ -236,39 +364,41 @@ class FHDecoder:
         return sp
 
     def get_requirements(self, beam: float, is_lstm=False):
-        # under 27 is short queue
-        rtf = 15
-
-        if not self.gpu:
-            rtf *= 4
-
-        if self.context_type not in [
-            PhoneticContext.monophone,
-            PhoneticContext.diphone,
-        ]:
-            rtf += 5
-
-        if beam > 17:
-            rtf += 10
-
-        if is_lstm:
-            rtf += 20
-            mem = 16.0
-            if "eval" in self.name:
-                rtf *= 2
-        else:
-            mem = 8
-
+        rtf, mem = _get_requirements(
+            gpu=bool(self.gpu),
+            context_type=self.context_type,
+            large_beam=beam > 17,
+            is_lstm=is_lstm,
+            is_eval="eval" in self.name,
+        )
         return {"rtf": rtf, "mem": mem}
 
+    @staticmethod
     def get_lookahead_options(scale=1.0, hlimit=-1, clow=0, chigh=500):
-        lmla_options = {
+        return {
             "scale": scale,
             "history_limit": hlimit,
             "cache_low": clow,
             "cache_high": chigh,
         }
-        return lmla_options
+
+    def get_cached_feature_scorer(self, **kwargs) -> FactoredHybridFeatureScorer:
+        """
+        Memoized `get_feature_scorer`, so that sweeps over search parameters that
+        do not affect the scorer (beam, LM scale, ...) reuse the same instance.
+        """
+        try:
+            key = tuple((k, _feature_scorer_arg_key(v)) for k, v in kwargs.items())
+            hash(key)
+        except TypeError:  # e.g. unhashable delayed values, don't cache
+            return get_feature_scorer(**kwargs)
+
+        if key not in self._feature_scorer_cache:
+            self._feature_scorer_cache[key] = get_feature_scorer(**kwargs)
+        return self._feature_scorer_cache[key]
+
+    def clear_feature_scorer_cache(self):
+        self._feature_scorer_cache.clear()
 
     def set_tf_fs_flow(self, feature_path, model_path, graph):
         tf_feature_flow = rasr.FlowNetwork()
@@ -374,128 +504,72 @@ class FHDecoder:
             fs_tf_config.loader.meta_graph_file = RecompileTfGraphJob(
                 meta_graph_file=fs_tf_config.loader.meta_graph_file
             ).out_graph
-        elif self.in_graph_acoustic_scoring:
-            raise NotImplementedError("in-graph scoring is being reworked")
-
-            fs_tf_config.loader.meta_graph_file = AddInGraphScorerJob(
-                graph=fs_tf_config.loader.meta_graph_file,
-                n_contexts=42,
-                tensor_map=self.tensor_map,
-            ).out_graph
 
         del fs_tf_config.input_map
 
-        # input is the same for each model, since the label embeddings are calculated from the dense label identity
-        fs_tf_config.input_map.info_0.param_name = "encoder-output"
-        fs_tf_config.input_map.info_0.tensor_name = self.tensor_map["in_encoder_output"]
-
+        input_maps = [("encoder-output", "in_encoder_output")]
         # monophone does not have any context
         if self.context_type != PhoneticContext.monophone:
-            fs_tf_config.input_map.info_1.param_name = "dense-classes"
-            fs_tf_config.input_map.info_1.tensor_name = self.tensor_map["in_classes"]
-
-        if self.context_type in [
-            PhoneticContext.monophone,
-            PhoneticContext.mono_state_transition,
-        ]:
-            fs_tf_config.output_map.info_0.param_name = "center-state-posteriors"
-            fs_tf_config.output_map.info_0.tensor_name = self.tensor_map[
-                "out_center_state"
+            input_maps.append(("dense-classes", "in_classes"))
+        if self.is_multi_encoder_output:
+            # the delta encoder takes the place of the dense classes in the
+            # monophone-delta case
+            delta_index = 1 if self.context_type.is_monophone() else 2
+            input_maps[delta_index:] = [
+                ("deltaEncoder-output", "in_delta_encoder_output")
             ]
-            if self.context_type == PhoneticContext.mono_state_transition:
-                # add the delta outputs
-                fs_tf_config.output_map.info_1.param_name = "delta-posteriors"
-                fs_tf_config.output_map.info_1.tensor_name = self.tensor_map[
-                    "out_delta"
-                ]
 
-        if self.context_type in [
-            PhoneticContext.diphone,
-            PhoneticContext.diphone_state_transition,
-        ]:
-            fs_tf_config.output_map.info_0.param_name = "center-state-posteriors"
-            fs_tf_config.output_map.info_0.tensor_name = self.tensor_map[
-                "out_center_state"
-            ]
-            fs_tf_config.output_map.info_1.param_name = "left-context-posteriors"
-            fs_tf_config.output_map.info_1.tensor_name = self.tensor_map[
-                "out_left_context"
-            ]
-            if self.context_type == PhoneticContext.diphone_state_transition:
-                fs_tf_config.output_map.info_2.param_name = "delta-posteriors"
-                fs_tf_config.output_map.info_2.tensor_name = self.tensor_map[
-                    "out_delta"
-                ]
+        # input is the same for each model, since the label embeddings are calculated from the dense label identity
+        for i, (param_name, tensor_key) in enumerate(input_maps):
+            info = fs_tf_config.input_map[f"info_{i}"]
+            info.param_name = param_name
+            info.tensor_name = self.tensor_map[tensor_key]
+
+        for i, (param_name, tensor_key) in enumerate(
+            _FS_OUTPUT_MAPS[self.context_type]
+        ):
+            info = fs_tf_config.output_map[f"info_{i}"]
+            info.param_name = param_name
+            info.tensor_name = self.tensor_map[tensor_key]
 
-        if self.context_type == PhoneticContext.triphone_symmetric:
-            fs_tf_config.output_map.info_0.param_name = "center-state-posteriors"
-            fs_tf_config.output_map.info_0.tensor_name = self.tensor_map[
-                "out_center_state"
-            ]
-            fs_tf_config.output_map.info_1.param_name = "left-context-posteriors"
-            fs_tf_config.output_map.info_1.tensor_name = self.tensor_map[
-                "out_left_context"
-            ]
-            fs_tf_config.output_map.info_2.param_name = "right-context-posteriors"
-            fs_tf_config.output_map.info_2.tensor_name = self.tensor_map[
-                "out_right_context"
-            ]
+        self.featureScorerConfig = fs_tf_config
 
-        if self.context_type in [
-            PhoneticContext.triphone_forward,
-            PhoneticContext.tri_state_transition,
-        ]:
-            # outputs
-            fs_tf_config.output_map.info_0.param_name = "right-context-posteriors"
-            fs_tf_config.output_map.info_0.tensor_name = self.tensor_map[
-                "out_right_context"
-            ]
-            fs_tf_config.output_map.info_1.param_name = "center-state-posteriors"
-            fs_tf_config.output_map.info_1.tensor_name = self.tensor_map[
-                "out_center_state"
-            ]
-            fs_tf_config.output_map.info_2.param_name = "left-context-posteriors"
-            fs_tf_config.output_map.info_2.tensor_name = self.tensor_map[
-                "out_left_context"
-            ]
+    def get_in_graph_scoring_config(
+        self, search_parameters: SearchParameters
+    ) -> typing.Tuple[rasr.RasrConfig, PriorInfo, PosteriorScales]:
+        """
+        Moves the center state prior and posterior scale into the TF graph.
+
+        Returns the feature scorer TF config reading the fused scores, and the
+        prior info and posterior scales the feature scorer must run with so the
+        scaling is not applied twice.
+        """
+        center_prior = search_parameters.prior_info.center_state_prior
+        posterior_scales = (
+            search_parameters.posterior_scales or default_posterior_scales()
+        )
 
-            if self.context_type == PhoneticContext.tri_state_transition:
-                fs_tf_config.output_map.info_3.param_name = "delta-posteriors"
-                fs_tf_config.output_map.info_3.tensor_name = self.tensor_map[
-                    "out_delta"
-                ]
+        scorer_job = AddInGraphScorerJob(
+            meta_graph_file=self.featureScorerConfig.loader.meta_graph_file,
+            tensor_name=self.tensor_map["out_center_state"],
+            prior_file=center_prior.file,
+            prior_scale=center_prior.scale,
+            posterior_scale=posterior_scales["center-state-scale"],
+        )
 
-        elif self.context_type == PhoneticContext.triphone_backward:
-            # outputs
-            fs_tf_config.output_map.info_0.param_name = "left-context-posteriors"
-            fs_tf_config.output_map.info_0.tensor_name = self.tensor_map[
-                "out_left_context"
-            ]
-            fs_tf_config.output_map.info_1.param_name = "right-context-posteriors"
-            fs_tf_config.output_map.info_1.tensor_name = self.tensor_map[
-                "out_right_context"
-            ]
-            fs_tf_config.output_map.info_2.param_name = "center-state-posteriors"
-            fs_tf_config.output_map.info_2.tensor_name = self.tensor_map[
-                "out_center_state"
-            ]
+        fs_tf_config = copy.deepcopy(self.featureScorerConfig)
+        fs_tf_config.loader.meta_graph_file = scorer_job.out_graph
+        # the center state is always the first output of the monophone models
+        fs_tf_config.output_map.info_0.tensor_name = scorer_job.out_tensor_name
 
-        if self.is_multi_encoder_output:
-            if self.context_type in [
-                PhoneticContext.monophone,
-                PhoneticContext.mono_state_transition,
-            ]:
-                fs_tf_config.input_map.info_1.param_name = "deltaEncoder-output"
-                fs_tf_config.input_map.info_1.tensor_name = self.tensor_map[
-                    "in_delta_encoder_output"
-                ]
-            else:
-                fs_tf_config.input_map.info_2.param_name = "deltaEncoder-output"
-                fs_tf_config.input_map.info_2.tensor_name = self.tensor_map[
-                    "in_delta_encoder_output"
-                ]
+        prior_info = copy.copy(search_parameters.prior_info)
+        prior_info.center_state_prior = center_prior.with_scale(0.0)
 
-        self.featureScorerConfig = fs_tf_config
+        return (
+            fs_tf_config,
+            prior_info,
+            {**posterior_scales, "center-state-scale": 1.0},
+        )
 
     def getFeatureFlow(self, feature_path, tf_flow):
         tf_feature_flow = rasr.FlowNetwork()
@@ -572,85 +646,36 @@ class FHDecoder:
         return self.get_tfrnn_lm_config(**lmConfigParams)
 
     def add_tfrnn_lms(self):
-        tfrnn_dir = "/u/beck/setups/swb1/2018-06-08_nnlm_decoding/dependencies/tfrnn"
-        # backup:  '/work/asr4/raissi/ms-thesis-setups/dependencies/tfrnn'
-
-        rnn_lm_config = rasr.RasrConfig()
-        rnn_lm_config.type = "tfrnn"
-        rnn_lm_config.vocab_file = tk.Path("%s/vocabulary" % tfrnn_dir)
-        rnn_lm_config.transform_output_negate = True
-        rnn_lm_config.vocab_unknown_word = "<unk>"
-
-        rnn_lm_config.loader.type = "meta"
-        rnn_lm_config.loader.meta_graph_file = tk.Path(
-            "%s/network.019.meta" % tfrnn_dir
-        )
-        rnn_lm_config.loader.saved_model_file = rasr.StringWrapper(
-            "%s/network.019" % tfrnn_dir, tk.Path("%s/network.019.index" % tfrnn_dir)
-        )
-        rnn_lm_config.loader.required_libraries = tk.Path(self.native_lstm_path)
-
-        rnn_lm_config.input_map.info_0.param_name = "word"
-        rnn_lm_config.input_map.info_0.tensor_name = (
-            "extern_data/placeholders/delayed/delayed"
-        )
-        rnn_lm_config.input_map.info_0.seq_length_tensor_name = (
-            "extern_data/placeholders/delayed/delayed_dim0_size"
-        )
-
-        rnn_lm_config.output_map.info_0.param_name = "softmax"
-        rnn_lm_config.output_map.info_0.tensor_name = "output/output_batch_major"
-
-        kazuki_fake_nce_lm = copy.deepcopy(rnn_lm_config)
         tfrnn_dir = "/work/asr3/beck/setups/swb1/2018-06-08_nnlm_decoding/dependencies/tfrnn_nce"
-        kazuki_fake_nce_lm.vocab_file = tk.Path(
-            "%s/vocabmap.freq_sorted.txt" % tfrnn_dir
+        spec = RnnLmSpec(
+            vocab_file=tk.Path("%s/vocabmap.freq_sorted.txt" % tfrnn_dir),
+            meta_graph_file=tk.Path("%s/inference.meta" % tfrnn_dir),
+            saved_model_file=rasr.StringWrapper(
+                "%s/network.018" % tfrnn_dir,
+                tk.Path("%s/network.018.index" % tfrnn_dir),
+            ),
+            softmax_tensor_name="sbn/output_batch_major",
         )
-        kazuki_fake_nce_lm.loader.meta_graph_file = tk.Path(
-            "%s/inference.meta" % tfrnn_dir
+        self.tfrnn_lms["kazuki_real_nce"] = get_rnn_lm_config(
+            spec, native_lstm_path=self.native_lstm_path
         )
-        kazuki_fake_nce_lm.loader.saved_model_file = rasr.StringWrapper(
-            "%s/network.018" % tfrnn_dir, tk.Path("%s/network.018.index" % tfrnn_dir)
-        )
-
-        kazuki_real_nce_lm = copy.deepcopy(kazuki_fake_nce_lm)
-        kazuki_real_nce_lm.output_map.info_0.tensor_name = "sbn/output_batch_major"
-
-        self.tfrnn_lms["kazuki_real_nce"] = kazuki_real_nce_lm
 
     def add_lstm_full(self):
         tfrnn_dir = (
             "/work/asr4/raissi/ms-thesis-setups/lm-sa-swb/dependencies/lstm-lm-kazuki"
         )
-
-        rnn_lm_config = rasr.RasrConfig()
-        rnn_lm_config.type = "tfrnn"
-        rnn_lm_config.vocab_file = tk.Path(("/").join([tfrnn_dir, "vocabulary"]))
-        rnn_lm_config.transform_output_negate = True
-        rnn_lm_config.vocab_unknown_word = "<unk>"
-
-        rnn_lm_config.loader.type = "meta"
-        rnn_lm_config.loader.meta_graph_file = tk.Path(
-            "%s/network.019.meta" % tfrnn_dir
-        )
-        rnn_lm_config.loader.saved_model_file = rasr.StringWrapper(
-            "%s/network.019" % tfrnn_dir, tk.Path("%s/network.019.index" % tfrnn_dir)
-        )
-        rnn_lm_config.loader.required_libraries = tk.Path(self.native_lstm_path)
-
-        rnn_lm_config.input_map.info_0.param_name = "word"
-        rnn_lm_config.input_map.info_0.tensor_name = (
-            "extern_data/placeholders/delayed/delayed"
+        spec = RnnLmSpec(
+            vocab_file=tk.Path("%s/vocabulary" % tfrnn_dir),
+            meta_graph_file=tk.Path("%s/network.019.meta" % tfrnn_dir),
+            saved_model_file=rasr.StringWrapper(
+                "%s/network.019" % tfrnn_dir,
+                tk.Path("%s/network.019.index" % tfrnn_dir),
+            ),
         )
-        rnn_lm_config.input_map.info_0.seq_length_tensor_name = (
-            "extern_data/placeholders/delayed/delayed_dim0_size"
+        self.tfrnn_lms["kazuki_full"] = get_rnn_lm_config(
+            spec, native_lstm_path=self.native_lstm_path
         )
 
-        rnn_lm_config.output_map.info_0.param_name = "softmax"
-        rnn_lm_config.output_map.info_0.tensor_name = "output/output_batch_major"
-
-        self.tfrnn_lms["kazuki_full"] = rnn_lm_config
-
     def recognize_count_lm(
         self,
         *,
@@ -665,31 +690,28 @@ class FHDecoder:
         use_estimated_tdps=False,
         add_sis_alias_and_output=True,
         rerun_after_opt_lm=False,
+        rescale_lattices_after_opt_lm=False,
         name_override: typing.Union[str, None] = None,
         name_prefix: str = "",
     ) -> RecognitionJobs:
-        assert len(search_parameters.tdp_speech) == 4
-        assert len(search_parameters.tdp_silence) == 4
-        assert (
-            not search_parameters.silence_penalties
-            or len(search_parameters.silence_penalties) == 2
-        )
-        assert (
-            not search_parameters.transition_scales
-            or len(search_parameters.transition_scales) == 2
-        )
-
-        name = (
-            name_override
-            if name_override is not None
-            else f"{name_prefix}{self.name}/"
-            + "-".join(
-                [
-                    f"Beam{search_parameters.beam}",
-                    f"Lm{search_parameters.lm_scale}",
-                ]
-            )
-        )
+        """
+        :param rerun_after_opt_lm: run the recognition again with the LM scale
+            optimized on the lattices of this search.
+        :param rescale_lattices_after_opt_lm: together with rerun_after_opt_lm,
+            rescale the existing lattices to the optimized LM scale instead of
+            running a second search.
+        """
+        tdp_scale = search_parameters.tdp_scale
+        tdp_speech = search_parameters.tdp_speech
+        tdp_sil = search_parameters.tdp_silence
+        transition_scales = search_parameters.transition_scales
+        silence_penalties = search_parameters.silence_penalties
+        prior = search_parameters.prior_info
+
+        assert len(tdp_speech) == 4
+        assert len(tdp_sil) == 4
+        assert not silence_penalties or len(silence_penalties) == 2
+        assert not transition_scales or len(transition_scales) == 2
 
         search_crp = copy.deepcopy(self.search_crp)
 
@@ -701,72 +723,70 @@ class FHDecoder:
             model_combination_config = None
             pron_scale = 1.0
 
-        # additional search parameters
-        if name_override is None:
-            name += f"-Pron{pron_scale}"
-
-        if name_override is None:
-            if search_parameters.prior_info.left_context_prior is not None:
-                name += f"-prL{search_parameters.prior_info.left_context_prior.scale}"
-            if search_parameters.prior_info.center_state_prior is not None:
-                name += f"-prC{search_parameters.prior_info.center_state_prior.scale}"
-            if search_parameters.prior_info.right_context_prior is not None:
-                name += f"-prR{search_parameters.prior_info.right_context_prior.scale}"
-
         loop_scale = forward_scale = 1.0
         sil_fwd_penalty = sil_loop_penalty = 0.0
 
-        if search_parameters.tdp_scale is not None:
-            if name_override is None:
-                name += f"-tdpScale-{search_parameters.tdp_scale}"
-                name += f"-tdpExit-{search_parameters.tdp_speech[-1]}"
-                name += f"-silExit-{search_parameters.tdp_silence[-1]}"
-                name += f"-tdpNWex-{20.0}"
-
-            if search_parameters.transition_scales is not None:
-                loop_scale, forward_scale = search_parameters.transition_scales
-
-                if name_override is None:
-                    name += f"-loopScale-{loop_scale}"
-                    name += f"-fwdScale-{forward_scale}"
-
-            if search_parameters.silence_penalties is not None:
-                sil_loop_penalty, sil_fwd_penalty = search_parameters.silence_penalties
-
-                if name_override is None:
-                    name += f"-silLoopP-{sil_loop_penalty}"
-                    name += f"-silFwdP-{sil_fwd_penalty}"
-
-            if (
-                search_parameters.tdp_speech[2] == "infinity"
-                and search_parameters.tdp_silence[2] == "infinity"
-                and name_override is None
-            ):
-                name += "-noSkip"
+        if tdp_scale is not None:
+            if transition_scales is not None:
+                loop_scale, forward_scale = transition_scales
+            if silence_penalties is not None:
+                sil_loop_penalty, sil_fwd_penalty = silence_penalties
+
+        if name_override is not None:
+            name = name_override
         else:
-            if name_override is None:
-                name += "-noTdp"
+            # collect the parts and join once, this is run for every point of a sweep
+            name_parts = [
+                f"{name_prefix}{self.name}/",
+                f"Beam{search_parameters.beam}",
+                f"-Lm{search_parameters.lm_scale}",
+                f"-Pron{pron_scale}",
+            ]
+
+            if prior.left_context_prior is not None:
+                name_parts.append(f"-prL{prior.left_context_prior.scale}")
+            if prior.center_state_prior is not None:
+                name_parts.append(f"-prC{prior.center_state_prior.scale}")
+            if prior.right_context_prior is not None:
+                name_parts.append(f"-prR{prior.right_context_prior.scale}")
+
+            if tdp_scale is not None:
+                name_parts += [
+                    f"-tdpScale-{tdp_scale}",
+                    f"-tdpExit-{tdp_speech[-1]}",
+                    f"-silExit-{tdp_sil[-1]}",
+                    f"-tdpNWex-{20.0}",
+                ]
+                if transition_scales is not None:
+                    name_parts += [
+                        f"-loopScale-{loop_scale}",
+                        f"-fwdScale-{forward_scale}",
+                    ]
+                if silence_penalties is not None:
+                    name_parts += [
+                        f"-silLoopP-{sil_loop_penalty}",
+                        f"-silFwdP-{sil_fwd_penalty}",
+                    ]
+                if tdp_speech[2] == "infinity" and tdp_sil[2] == "infinity":
+                    name_parts.append("-noSkip")
+            else:
+                name_parts.append("-noTdp")
 
-        if name_override is None:
             if search_parameters.we_pruning > 0.5:
-                name += f"-wep{search_parameters.we_pruning}"
+                name_parts.append(f"-wep{search_parameters.we_pruning}")
             if search_parameters.altas is not None:
-                name += f"-ALTAS{search_parameters.altas}"
+                name_parts.append(f"-ALTAS{search_parameters.altas}")
             if search_parameters.add_all_allophones:
-                name += "-allAllos"
+                name_parts.append("-allAllos")
+
+            name = "".join(name_parts)
 
         state_tying = search_crp.acoustic_model_config.state_tying.type
 
         tdp_transition = (
-            search_parameters.tdp_speech
-            if search_parameters.tdp_scale is not None
-            else (0.0, 0.0, "infinity", 0.0)
-        )
-        tdp_silence = (
-            search_parameters.tdp_silence
-            if search_parameters.tdp_scale is not None
-            else (0.0, 0.0, "infinity", 0.0)
+            tdp_speech if tdp_scale is not None else (0.0, 0.0, "infinity", 0.0)
         )
+        tdp_silence = tdp_sil if tdp_scale is not None else (0.0, 0.0, "infinity", 0.0)
 
         search_crp.acoustic_model_config = am.acoustic_model_config(
             state_tying=state_tying,
@@ -774,7 +794,7 @@ class FHDecoder:
             state_repetitions=1,
             across_word_model=True,
             early_recombination=False,
-            tdp_scale=search_parameters.tdp_scale,
+            tdp_scale=tdp_scale,
             tdp_transition=tdp_transition,
             tdp_silence=tdp_silence,
         )
@@ -813,14 +833,25 @@ class FHDecoder:
         else:
             adv_search_extra_config = None
 
-        feature_scorer = get_feature_scorer(
+        if self.in_graph_acoustic_scoring:
+            (
+                feature_scorer_config,
+                prior_info,
+                posterior_scales,
+            ) = self.get_in_graph_scoring_config(search_parameters)
+        else:
+            feature_scorer_config = self.featureScorerConfig
+            prior_info = prior
+            posterior_scales = search_parameters.posterior_scales
+
+        feature_scorer = self.get_cached_feature_scorer(
             context_type=self.context_type,
             label_info=label_info,
-            feature_scorer_config=self.featureScorerConfig,
+            feature_scorer_config=feature_scorer_config,
             mixtures=self.mixtures,
             silence_id=self.silence_id,
-            prior_info=search_parameters.prior_info,
-            posterior_scales=search_parameters.posterior_scales,
+            prior_info=prior_info,
+            posterior_scales=posterior_scales,
             num_label_contexts=label_info.n_contexts,
             num_states_per_phone=label_info.n_states_per_phone,
             num_encoder_output=num_encoder_output,
@@ -870,21 +901,11 @@ class FHDecoder:
         if keep_value is not None:
             search.keep_value(keep_value)
 
-        lat2ctm_extra_config = rasr.RasrConfig()
-        lat2ctm_extra_config.flf_lattice_tool.network.to_lemma.links = "best"
-        lat2ctm = recog.LatticeToCtmJob(
+        lat2ctm, scorer = self.score_lattices(
             crp=search_crp,
             lattice_cache=search.out_lattice_bundle,
-            parallelize=True,
-            best_path_algo="bellman-ford",
-            extra_config=lat2ctm_extra_config,
-            fill_empty_segments=True,
         )
 
-        s_kwrgs = copy.copy(self.eval_files)
-        s_kwrgs["hyp"] = lat2ctm.out_ctm_file
-        scorer = recog.ScliteJob(**s_kwrgs)
-
         if add_sis_alias_and_output:
             tk.register_output(f"{pre_path}/{name}.wer", scorer.out_report_dir)
 
@@ -897,7 +918,7 @@ class FHDecoder:
                 initial_am_scale=pron_scale,
                 initial_lm_scale=search_parameters.lm_scale,
                 scorer_cls=recog.ScliteJob,
-                scorer_kwargs=s_kwrgs,
+                scorer_kwargs={**self.eval_files, "hyp": lat2ctm.out_ctm_file},
                 opt_only_lm_scale=only_lm_opt,
             )
 
@@ -909,6 +930,24 @@ class FHDecoder:
 
             if rerun_after_opt_lm:
                 rounded = Delayed(opt.out_best_lm_score).function(round2)
+
+                if rescale_lattices_after_opt_lm:
+                    lat2ctm, scorer = self.score_lattices(
+                        crp=search_crp,
+                        lattice_cache=search.out_lattice_bundle,
+                        lm_scale=rounded,
+                    )
+
+                    if add_sis_alias_and_output:
+                        tk.register_output(
+                            f"{pre_path}/{name}-optlm-rescaled.wer",
+                            scorer.out_report_dir,
+                        )
+
+                    return RecognitionJobs(
+                        lat2ctm=lat2ctm, sclite=scorer, search=search, search_stats=stat
+                    )
+
                 params = search_parameters.with_lm_scale(rounded)
 
                 return self.recognize_count_lm(
@@ -930,6 +969,38 @@ class FHDecoder:
             lat2ctm=lat2ctm, sclite=scorer, search=search, search_stats=stat
         )
 
+    def score_lattices(
+        self,
+        *,
+        crp: rasr.CommonRasrParameters,
+        lattice_cache: tk.Path,
+        lm_scale: typing.Optional[Float] = None,
+    ) -> typing.Tuple[recog.LatticeToCtmJob, recog.ScliteJob]:
+        """
+        Extracts the best path from the lattices and scores it.
+
+        :param lm_scale: if set, overrides the LM scale the lattices were created
+            with before extracting the best path.
+        """
+        lat2ctm_extra_config = rasr.RasrConfig()
+        lat2ctm_extra_config.flf_lattice_tool.network.to_lemma.links = "best"
+        if lm_scale is not None:
+            network = lat2ctm_extra_config.flf_lattice_tool.network
+            network.archive_reader.flf.semiring.lm.scale = lm_scale
+
+        lat2ctm = recog.LatticeToCtmJob(
+            crp=crp,
+            lattice_cache=lattice_cache,
+            parallelize=True,
+            best_path_algo="bellman-ford",
+            extra_config=lat2ctm_extra_config,
+            fill_empty_segments=True,
+        )
+
+        scorer = recog.ScliteJob(**{**self.eval_files, "hyp": lat2ctm.out_ctm_file})
+
+        return lat2ctm, scorer
+
     def align(
         self,
         name,
@@ -0,0 +1,72 @@
+__all__ = ["AddInGraphScorerJob"]
+
+import typing
+
+from sisyphus import tk, Job, Task
+from sisyphus.tools import try_get
+
+
+class AddInGraphScorerJob(Job):
+    """
+    Fuses the acoustic scoring of the center state posteriors into the TF graph.
+
+    Adds a tensor computing `p^posterior_scale / prior^prior_scale` on top of the
+    center state softmax, so that the feature scorer can read the pre-scaled
+    scores and run with unit posterior scale and without prior.
+
+    Only context independent priors (`vector-f32`) can be fused, the context
+    dependent ones are indexed by the dense label on the RASR side.
+    """
+
+    def __init__(
+        self,
+        *,
+        meta_graph_file: typing.Union[str, tk.Path],
+        tensor_name: str,
+        prior_file: typing.Union[str, tk.Path],
+        prior_scale: typing.Any,
+        posterior_scale: typing.Any = 1.0,
+        out_tensor_name: str = "center-output-scored",
+    ):
+        super().__init__()
+
+        self.meta_graph_file = meta_graph_file
+        self.tensor_name = tensor_name
+        self.prior_file = prior_file
+        self.prior_scale = prior_scale
+        self.posterior_scale = posterior_scale
+
+        self.out_tensor_name = out_tensor_name
+        self.out_graph = self.output_path("graph.meta")
+
+    def tasks(self):
+        yield Task("run", mini_task=True)
+
+    def run(self):
+        import numpy as np
+        import tensorflow as tf
+        import xml.etree.ElementTree as ET
+
+        prior_xml = ET.parse(tk.uncached_path(self.prior_file)).getroot()
+        assert (
+            prior_xml.tag == "vector-f32"
+        ), f"can only fuse context independent priors, got {prior_xml.tag}"
+        log_prior = np.array(prior_xml.text.split(), dtype=np.float32)
+
+        prior_scale = float(try_get(self.prior_scale))
+        posterior_scale = float(try_get(self.posterior_scale))
+
+        with tf.Graph().as_default() as graph:
+            saver = tf.compat.v1.train.import_meta_graph(
+                tk.uncached_path(self.meta_graph_file), clear_devices=True
+            )
+
+            posteriors = graph.get_tensor_by_name(f"{self.tensor_name}:0")
+            scores = posterior_scale * tf.math.log(posteriors) - prior_scale * log_prior
+            tf.exp(scores, name=self.out_tensor_name)
+
+            tf.compat.v1.train.export_meta_graph(
+                filename=self.out_graph.get_path(),
+                graph=graph,
+                saver_def=saver.as_saver_def() if saver is not None else None,
+            )
@@ -125,6 +125,12 @@ class CtcSystem(RasrSystem):
 
         self.tf_checkpoints = {}  # type: Dict[str, Dict[int, Checkpoint]]
 
+        # (corpus_key, feature_flow, checkpoint, device) -> prior xml file
+        self._prior_cache = {}  # type: Dict[Tuple, tk.Path]
+        self._native_op = None  # type: Optional[tk.Path]
+        # (corpus_key, cv_size, sort_chunk_size) -> (train crp, cv crp)
+        self._cv_split_cache = {}  # type: Dict[Tuple[str, float, int], Tuple[rasr.CommonRasrParameters, rasr.CommonRasrParameters]]
+
     # -------------------- Setup --------------------
     def init_system(
         self,
@@ -152,6 +158,11 @@ class CtcSystem(RasrSystem):
 
             break
 
+        # the state tying only depends on the lexicon and the acoustic model, not on the training,
+        # so recognitions can be set up independently of train_nn
+        corpus_key = self.train_corpora[0]
+        self.state_tying = DumpStateTyingJob(self.crp[corpus_key]).out_state_tying
+
         for name, v in sorted(dev_data.items()):
             self.add_corpus(name, data=v, add_lm=True)
             self.dev_corpora.append(name)
@@ -261,25 +272,25 @@ class CtcSystem(RasrSystem):
             loss_crp.lexicon_config = lexicon_config
         return loss_crp
 
-    def train_nn(
-        self,
-        name,
-        corpus_key,
-        feature_flow,
-        returnn_config,
-        num_classes,
-        use_hdf=False,
-        add_speaker_map=False,
-        **kwargs,
-    ):
-        assert isinstance(
-            returnn_config, ReturnnConfig
-        ), "Passing returnn_config as dict to train_nn is no longer supported, please construct a ReturnnConfig object instead"
+    def _add_train_cv_overlays(self, corpus_key, cv_size, sort_chunk_size=384):
+        """
+        Splits the corpus into train and cv segments and adds the corresponding overlays.
+        Done once per corpus, cv size and chunk size, later trainings reuse the overlays.
 
-        corpus_key = self.train_corpora[0]
+        :param str corpus_key:
+        :param float cv_size:
+        :param int sort_chunk_size: number of segments sorted by length together,
+            larger chunks mean less padding in the batches but less randomness in the segment order
+        :return: train and cv corpus keys
+        :rtype: (str, str)
+        """
         train_corpus_key = corpus_key + "_train"
         cv_corpus_key = corpus_key + "_cv"
-        cv_size = 0.005
+        cache_key = (corpus_key, cv_size, sort_chunk_size)
+        if cache_key in self._cv_split_cache:
+            self.crp[train_corpus_key], self.crp[cv_corpus_key] = self._cv_split_cache[cache_key]
+            return train_corpus_key, cv_corpus_key
+
         all_segments = SegmentCorpusJob(
             self.corpora[corpus_key].corpus_file, 1
         ).out_single_segment_files[1]
@@ -300,12 +311,39 @@ class CtcSystem(RasrSystem):
         ].corpus_config.segment_order_sort_by_time_length = True
         self.crp[
             train_corpus_key
-        ].corpus_config.segment_order_sort_by_time_length_chunk_size = 384
+        ].corpus_config.segment_order_sort_by_time_length_chunk_size = sort_chunk_size
         self.add_overlay(corpus_key, cv_corpus_key)
         self.crp[cv_corpus_key].corpus_config = copy.deepcopy(
             self.crp[train_corpus_key].corpus_config
         )
         self.crp[cv_corpus_key].corpus_config.segments.file = cv_segments
+        self._cv_split_cache[cache_key] = (self.crp[train_corpus_key], self.crp[cv_corpus_key])
+
+        return train_corpus_key, cv_corpus_key
+
+    def train_nn(
+        self,
+        name,
+        corpus_key,
+        feature_flow,
+        returnn_config,
+        num_classes,
+        use_hdf=False,
+        add_speaker_map=False,
+        **kwargs,
+    ):
+        assert isinstance(
+            returnn_config, ReturnnConfig
+        ), "Passing returnn_config as dict to train_nn is no longer supported, please construct a ReturnnConfig object instead"
+
+        corpus_key = self.train_corpora[0]
+        sort_chunk_size = kwargs.pop("sort_chunk_size", 384)
+        if sort_chunk_size == "auto":
+            # at least 8 full batches per sorted chunk, so that the batches are built from segments of similar length
+            sort_chunk_size = max(384, 8 * returnn_config.config.get("max_seqs", 64))
+        train_corpus_key, cv_corpus_key = self._add_train_cv_overlays(
+            corpus_key, cv_size=0.005, sort_chunk_size=sort_chunk_size
+        )
 
         self.crp["loss"] = rasr.CommonRasrParameters(base=self.crp[corpus_key])
         config, post_config = self.create_full_sum_loss_config(num_classes)
@@ -345,13 +383,19 @@ class CtcSystem(RasrSystem):
             }
 
 
-        def add_rasr_loss(network, custom_config=None):
+        # the same for every stage, so only build it once
+        sprint_opts = self.create_rasr_loss_opts(custom_config=custom_config)
+
+        def add_rasr_loss(network):
+            # the config may come from an earlier train_nn call (e.g. with another use_hdf), so only keep identical loss opts
+            if network.get("rasr_loss", {}).get("loss_opts", {}).get("sprint_opts") == sprint_opts:
+                return
             network["rasr_loss"] = {
                 "class": "copy",
                 "from": "output",
                 "loss_opts": {
                     'tdp_scale': 0.0,
-                    "sprint_opts": self.create_rasr_loss_opts(custom_config=custom_config)
+                    "sprint_opts": sprint_opts
                 },
                 "loss": "fast_bw",
                 "target": None,
@@ -359,12 +403,19 @@ class CtcSystem(RasrSystem):
 
         if returnn_config.staged_network_dict:
             for net in returnn_config.staged_network_dict.values():
-                add_rasr_loss(net, custom_config=custom_config)
+                add_rasr_loss(net)
         else:
             if returnn_config.config['network']['output'].get("loss", None) != "fast_bw":
-                add_rasr_loss(returnn_config.config["network"], custom_config=custom_config)
+                add_rasr_loss(returnn_config.config["network"])
 
 
+        if kwargs.pop("xla_jit", False):
+            # let TF cluster and compile the graph with XLA, fusing the element-wise ops of each step
+            # on a copy, other jobs may already use the passed config
+            returnn_config = copy.deepcopy(returnn_config)
+            session_opts = returnn_config.config.setdefault("tf_session_opts", {})
+            session_opts.setdefault("graph_options", {}).setdefault("optimizer_options", {})["global_jit_level"] = 1
+
         if add_speaker_map:
             from i6_core.corpus.convert import CorpusToSpeakerMap
             speaker_map = CorpusToSpeakerMap(self.corpora[corpus_key].corpus_file).out_speaker_target_map
@@ -401,13 +452,10 @@ class CtcSystem(RasrSystem):
         #self.nn_models[corpus_key][name] = j.out_models
         self.nn_configs[corpus_key][name] = j.out_returnn_config_file
 
-        state_tying_job = DumpStateTyingJob(self.crp[corpus_key])
         tk.register_output(
             "{}_{}_state_tying".format(corpus_key, name),
-            state_tying_job.out_state_tying,
+            self.state_tying,
         )
-        self.state_tying = state_tying_job.out_state_tying
-
 
     @classmethod
     def get_specific_returnn_config(cls, returnn_config, epoch=None, log_activation=False):
@@ -470,6 +518,22 @@ class CtcSystem(RasrSystem):
 
         return tf_graph
 
+    def _get_native_op(self):
+        """
+        :return: the compiled NativeLstm2 op, the same for every recognition
+        :rtype: tk.Path
+        """
+        if self._native_op is None:
+            # DO NOT USE BLAS ON I6, THIS WILL SLOW DOWN RECOGNITION ON OPTERON MACHNIES BY FACTOR 4
+            self._native_op = CompileNativeOpJob(
+                "NativeLstm2",
+                returnn_python_exe=self.recognition_args.compile_exec or self.defalt_training_args['returnn_python_exe'],
+                returnn_root=self.defalt_training_args['returnn_root'],
+                # blas_lib=tk.Path(gs.BLAS_LIB, hash_overwrite="BLAS_LIB")).out_op,
+                blas_lib=self.recognition_args.blas_lib,
+                search_numpy_blas=False).out_op
+        return self._native_op
+
     @classmethod
     def _cut_ending(cls, path):
         return path[: -len(".meta")]
@@ -517,19 +581,7 @@ class CtcSystem(RasrSystem):
         #tf_flow.config[tf_fwd].loader.saved_model_file = tf_checkpoint.get_delayed_checkpoint_path()
         tf_flow.config[tf_fwd].loader.saved_model_file = tf_checkpoint
 
-        # TODO: HACK
-        from i6_core.returnn.compile import CompileNativeOpJob
-
-        # DO NOT USE BLAS ON I6, THIS WILL SLOW DOWN RECOGNITION ON OPTERON MACHNIES BY FACTOR 4
-        native_op = CompileNativeOpJob(
-            "NativeLstm2",
-            returnn_python_exe=self.recognition_args.compile_exec or self.defalt_training_args['returnn_python_exe'],
-            returnn_root=self.defalt_training_args['returnn_root'],
-            # blas_lib=tk.Path(gs.BLAS_LIB, hash_overwrite="BLAS_LIB")).out_op,
-            blas_lib=self.recognition_args.blas_lib,
-            search_numpy_blas=False).out_op
-
-        tf_flow.config[tf_fwd].loader.required_libraries = native_op
+        tf_flow.config[tf_fwd].loader.required_libraries = self._get_native_op()
 
         # interconnect flows #
         tf_feature_flow = rasr.FlowNetwork()
@@ -575,6 +627,18 @@ class CtcSystem(RasrSystem):
             #assert self.nn_priors[corpus_key][nn_name][epoch], 'No existing prior found'
             #return self.nn_priors[corpus_key][nn_name][epoch]
         else:
+            device = kwargs.get('nn_prior_device', 'gpu')
+            # the prior only depends on the checkpoint, not on the recognition parameters,
+            # so it is shared by all points of a recognition sweep
+            cache_key = (
+                corpus_key,
+                tuple(feature_flow) if isinstance(feature_flow, list) else feature_flow,
+                tf_checkpoint,
+                device,
+            )
+            if cache_key in self._prior_cache:
+                return self._prior_cache[cache_key]
+
             args = {
                 'train_crp': self.crp[corpus_key + "_train"],
                 'dev_crp': self.crp[corpus_key + "_cv"],
@@ -583,7 +647,7 @@ class CtcSystem(RasrSystem):
                 'time_rqmt': 8,
                 'mem_rqmt': 8,
                 'cpu_rqmt': 2,
-                'device': kwargs.get('nn_prior_device','gpu'),
+                'device': device,
                 'returnn_config': self.get_specific_returnn_config(self.returnn_config),
                 'returnn_python_exe': self.defalt_training_args['returnn_python_exe'],
                 'returnn_root': self.defalt_training_args['returnn_root'],
@@ -613,6 +677,7 @@ class CtcSystem(RasrSystem):
             #     })
 
             prior_job = ReturnnRasrComputePriorJob(**args)
+            self._prior_cache[cache_key] = prior_job.out_prior_xml_file
             return prior_job.out_prior_xml_file
 
     def recog(
@@ -725,6 +790,49 @@ class CtcSystem(RasrSystem):
         self.jobs[corpus_key]["scorer_%s" % name] = scorer
         tk.register_output("%srecog_%s.reports" % (prefix, name), scorer.out_report_dir)
 
+        return rec
+
+    def rescale_lattice(
+            self,
+            name,
+            corpus_key,
+            lattice_bundle,
+            lm_scale,
+            parallelize_conversion=False,
+            lattice_to_ctm_kwargs=None,
+            prefix="",
+    ):
+        """
+        Scores the lattices of an existing search with a different LM scale, without searching again.
+
+        :param str name:
+        :param str corpus_key:
+        :param tk.Path lattice_bundle:
+        :param float lm_scale: LM scale of the lattice semiring for the best path extraction
+        :param bool parallelize_conversion:
+        :param dict|None lattice_to_ctm_kwargs:
+        :param str prefix:
+        """
+        lattice_to_ctm_kwargs = dict(lattice_to_ctm_kwargs or {})
+        extra_config = copy.deepcopy(lattice_to_ctm_kwargs.pop("extra_config", None)) or rasr.RasrConfig()
+        extra_config.flf_lattice_tool.network.archive_reader.flf.semiring.lm.scale = lm_scale
+
+        self.jobs[corpus_key]["lat2ctm_%s" % name] = lat2ctm = recog.LatticeToCtmJob(
+            crp=self.crp[corpus_key],
+            lattice_cache=lattice_bundle,
+            parallelize=parallelize_conversion,
+            extra_config=extra_config,
+            **lattice_to_ctm_kwargs,
+        )
+        self.ctm_files[corpus_key]["recog_%s" % name] = lat2ctm.out_ctm_file
+
+        kwargs = copy.deepcopy(self.scorer_args[corpus_key])
+        kwargs[self.scorer_hyp_arg[corpus_key]] = lat2ctm.out_ctm_file
+        scorer = self.scorers[corpus_key](**kwargs)
+
+        self.jobs[corpus_key]["scorer_%s" % name] = scorer
+        tk.register_output("%srecog_%s.reports" % (prefix, name), scorer.out_report_dir)
+
     def nn_align(
             self,
             name,
@@ -837,6 +945,7 @@ class CtcSystem(RasrSystem):
             mem: float,
             parallelize_conversion: bool,
             lattice_to_ctm_kwargs: dict,
+            rescale_lattices: bool = False,
             **kwargs,
     ):
         """
@@ -858,6 +967,8 @@ class CtcSystem(RasrSystem):
         :param mem:
         :param parallelize_conversion:
         :param lattice_to_ctm_kwargs:
+        :param rescale_lattices: search only once per iteration and pronunciation scale with the first LM scale,
+            and score the other LM scales by rescaling the lattices of that search
         :return:
         """
         assert (
@@ -874,9 +985,23 @@ class CtcSystem(RasrSystem):
 
             lm_scales = [lm_scales] if isinstance(lm_scales, float) else lm_scales
 
+            searches = {}  # (iter, pronunciation scale) -> search job
             for it, p, l in itertools.product(iters, pronunciation_scales, lm_scales):
-                self.recog(
-                    name=f"{name}-{corpus_key}-ps{p:02.2f}-lm{l:02.2f}-iter{it:02d}",
+                recog_name = f"{name}-{corpus_key}-ps{p:02.2f}-lm{l:02.2f}-iter{it:02d}"
+                if rescale_lattices and (it, p) in searches:
+                    self.rescale_lattice(
+                        name=recog_name,
+                        prefix=f"recognition/{name}/",
+                        corpus_key=corpus_key,
+                        lattice_bundle=searches[(it, p)].out_lattice_bundle,
+                        lm_scale=l,
+                        parallelize_conversion=parallelize_conversion,
+                        lattice_to_ctm_kwargs=lattice_to_ctm_kwargs,
+                    )
+                    continue
+
+                searches[(it, p)] = self.recog(
+                    name=recog_name,
                     prefix=f"recognition/{name}/",
                     corpus_key=corpus_key,
                     flow=feature_flow,
@@ -1,13 +1,11 @@
 # TODO: package, make imports smaller
-from typing import OrderedDict
 from recipe.i6_experiments.users.schupp.hybrid_hmm_nn.args import setup_god as god
 from recipe.i6_experiments.users.schupp.hybrid_hmm_nn.args import conformer_config_returnn_baseargs as experiment_config_args
 from recipe.i6_experiments.users.schupp.hybrid_hmm_nn.args import conformer_returnn_dict_network_generator
+from recipe.i6_experiments.users.schupp.hybrid_hmm_nn.args.conv_mod_versions import make_conv_mod_003_sd
+from recipe.i6_experiments.users.schupp.hybrid_hmm_nn.args.ff_mod_versions import make_ff_mod_002_sd
 
 from sisyphus import gs
-import copy
-
-import inspect
 
 OUTPUT_PATH = "conformer/stochastic_depth/"
 gs.ALIAS_AND_OUTPUT_SUBDIR = OUTPUT_PATH
@@ -16,30 +14,31 @@ def main():
   sd_only_conv()
   sd_only_ff()
 
+def _override(base, **kwargs):
+  # Copy of the template with some top level args replaced
+  return {**base, **kwargs}
+
 def sd_only_conv():
 
   NAME = "baseline+bs-7254+sd-conv"
-  config_args = copy.deepcopy(experiment_config_args.config_baseline_00)
-  config_args["batch_size"] = 7254
-
-  from recipe.i6_experiments.users.schupp.hybrid_hmm_nn.args.conv_mod_versions import make_conv_mod_003_sd
+  config_args = _override(experiment_config_args.config_baseline_00, batch_size=7254)
 
-  conv_args = copy.deepcopy(experiment_config_args.conv_default_args_00)
-  conv_args.update(OrderedDict(
+  conv_args = _override(
+    experiment_config_args.conv_default_args_00,
     survival_prob = 0.5 # For all conv layers, see make_conformer_02 for variations on every layer
-  ))
+  )
 
-  conformer_args = copy.deepcopy(experiment_config_args.conformer_default_args_00)
+  conformer_args = experiment_config_args.conformer_default_args_00 # only spread into conformer_func_args, no copy needed
 
   god.create_experiment_world_001(
     name=NAME,
     output_path=OUTPUT_PATH,
     config_base_args=config_args,
-    extra_returnn_net_creation_args = OrderedDict(
+    extra_returnn_net_creation_args = dict(
       recoursion_depth=8000, # Maybe a little high but who bothers
     ),
     conformer_create_func=conformer_returnn_dict_network_generator.make_conformer_00,
-    conformer_func_args=OrderedDict(
+    conformer_func_args=dict(
       # sampling args
       sampling_func_args = experiment_config_args.sampling_default_args_00,
 
@@ -70,29 +69,26 @@ def sd_only_conv():
 def sd_only_ff():
 
   NAME = "baseline+bs-7254+sd-ff"
-  config_args = copy.deepcopy(experiment_config_args.config_baseline_00)
-  config_args["batch_size"] = 7254
-
-  from recipe.i6_experiments.users.schupp.hybrid_hmm_nn.args.ff_mod_versions import make_ff_mod_002_sd
+  config_args = _override(experiment_config_args.config_baseline_00, batch_size=7254)
 
-  conv_args = copy.deepcopy(experiment_config_args.conv_default_args_00)
+  conv_args = experiment_config_args.conv_default_args_00
 
-  ff_args = copy.deepcopy(experiment_config_args.ff_default_args_00)
-  ff_args.update(OrderedDict(
+  ff_args = _override(
+    experiment_config_args.ff_default_args_00,
     survival_prob = 0.5,
-  ))
+  )
 
-  conformer_args = copy.deepcopy(experiment_config_args.conformer_default_args_00)
+  conformer_args = experiment_config_args.conformer_default_args_00 # only spread into conformer_func_args, no copy needed
 
   god.create_experiment_world_001(
     name=NAME,
     output_path=OUTPUT_PATH,
     config_base_args=config_args,
-    extra_returnn_net_creation_args = OrderedDict(
+    extra_returnn_net_creation_args = dict(
       recoursion_depth=8000, # Maybe a little high but who bothers
     ),
     conformer_create_func=conformer_returnn_dict_network_generator.make_conformer_00,
-    conformer_func_args=OrderedDict(
+    conformer_func_args=dict(
       # sampling args
       sampling_func_args = experiment_config_args.sampling_default_args_00,
 
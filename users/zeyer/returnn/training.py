@@ -5,7 +5,8 @@ RETURNN training utils
 from __future__ import annotations
 
 import sys
-from typing import Optional, Set, TextIO
+from typing import Dict, List, Optional, Set, TextIO, Tuple
+import ast
 import os
 import subprocess
 import copy
@@ -174,73 +175,101 @@ def get_relevant_epochs_from_training_learning_rate_scores(
     if log_stream is None:
         log_stream = open(os.devnull, "w")
     print(f"Check relevant epochs in {model_dir.get_path()}", file=log_stream)
-    score_keys = set()
+    with open(scores_and_learning_rates.get_path()) as f:
+        scores = _parse_learning_rate_scores(f.read())
 
-    # simple wrapper, to eval newbob.data
-    # noinspection PyPep8Naming
-    def EpochData(learningRate, error):
-        """
-        :param float learningRate:
-        :param dict[str,float] error: keys are e.g. "dev_score_output" etc
-        :rtype: dict[str,float]
-        """
-        assert isinstance(error, dict)
-        score_keys.update(error.keys())
-        d = {"learning_rate": learningRate}
-        d.update(error)
-        return d
-
-    # nan/inf, for some broken newbob.data
-    nan = float("nan")
-    inf = float("inf")
-
-    scores_str = open(scores_and_learning_rates.get_path()).read()
-    scores = eval(scores_str, {"EpochData": EpochData, "nan": nan, "inf": inf})
-    assert isinstance(scores, dict)
-    all_epochs = sorted(scores.keys())
+    # collect the (score, epoch) pairs of all dev keys in a single pass over the epochs
+    dev_scores_by_key: Dict[str, List[Tuple[float, int]]] = {}
+    for ep in sorted(scores.keys()):
+        for score_key, value in scores[ep].items():
+            if score_key.startswith("dev_"):
+                dev_scores_by_key.setdefault(score_key, []).append((float(value), int(ep)))
 
     suggested_epochs = set()
-    for score_key in score_keys:
-        if not score_key.startswith("dev_"):
-            continue
-        dev_scores = sorted([
-            (float(scores[ep][score_key]), int(ep))
-            for ep in all_epochs if score_key in scores[ep]])
-        assert dev_scores
+    for score_key, dev_scores in dev_scores_by_key.items():
+        dev_scores.sort()
         if dev_scores[0][0] == dev_scores[-1][0]:
             # All values are the same (e.g. 0.0), so no information. Just ignore this score_key.
             continue
         if dev_scores[0] == (0.0, 1):
             # Heuristic. Ignore the key if it looks invalid.
             continue
-        for value, ep in sorted(dev_scores)[:n_best]:
+        for value, ep in dev_scores[:n_best]:
             suggested_epochs.add(ep)
             print("Suggest: epoch %i because %s %f" % (ep, score_key, value), file=log_stream)
 
     print("Suggested epochs:", suggested_epochs, file=log_stream)
     assert suggested_epochs
 
+    # list the model dir once instead of checking every epoch separately (slow on network file systems)
+    existing_files = _list_chkpt_index_files(model_dir)
     for ep in sorted(suggested_epochs):
-        if not _chkpt_exists(model_dir=model_dir, model_name=model_name, epoch=ep):
+        if not _chkpt_exists(model_dir=model_dir, model_name=model_name, epoch=ep, existing_files=existing_files):
             print("Model does not exist (anymore):", suggested_epochs, file=log_stream)
             suggested_epochs.remove(ep)
     assert suggested_epochs  # after filter
     return suggested_epochs
 
 
-def _chkpt_exists(*, model_dir: tk.Path, model_name: str = "epoch", epoch: int) -> bool:
+def _parse_learning_rate_scores(scores_str: str) -> Dict[int, Dict[str, float]]:
+    """
+    Parses the RETURNN learning rate file (newbob.data),
+    i.e. ``{epoch: EpochData(learningRate=..., error={...}), ...}``,
+    without executing it.
+
+    :param scores_str: file content
+    :return: epoch -> {"learning_rate": ..., "dev_score_output": ..., ...}
+    """
+
+    class _NanInfToConstant(ast.NodeTransformer):
+        # nan/inf, for some broken newbob.data
+        def visit_Name(self, node: ast.Name) -> ast.AST:
+            if node.id in ("nan", "inf"):
+                return ast.copy_location(ast.Constant(float(node.id)), node)
+            return node
+
+    tree = _NanInfToConstant().visit(ast.parse(scores_str, mode="eval"))
+    assert isinstance(tree.body, ast.Dict), f"unexpected learning rate file content: {tree.body}"
+    scores = {}
+    for key, value in zip(tree.body.keys, tree.body.values):
+        assert (
+            isinstance(value, ast.Call) and isinstance(value.func, ast.Name) and value.func.id == "EpochData"
+        ), f"unexpected learning rate file entry: {ast.dump(value)}"
+        args = dict(zip(("learningRate", "error"), value.args))
+        args.update({kw.arg: kw.value for kw in value.keywords})
+        error = ast.literal_eval(args["error"])
+        assert isinstance(error, dict)
+        d = {"learning_rate": ast.literal_eval(args["learningRate"])}
+        d.update(error)
+        scores[ast.literal_eval(key)] = d
+    return scores
+
+
+def _list_chkpt_index_files(model_dir: tk.Path) -> Set[str]:
+    """
+    :param model_dir: ReturnnTrainingJob.out_model_dir
+    :return: file names of all checkpoint index files in model_dir
+    """
+    with os.scandir(model_dir.get_path()) as it:
+        return {entry.name for entry in it if entry.name.endswith(".index")}
+
+
+def _chkpt_exists(
+        *, model_dir: tk.Path, model_name: str = "epoch", epoch: int, existing_files: Optional[Set[str]] = None
+) -> bool:
     """
     :param model_dir: ReturnnTrainingJob.out_model_dir
     :param model_name: RETURNN config `model` option. this is hardcoded to "epoch" in ReturnnTrainingJob
     :param int epoch:
+    :param existing_files: from :func:`_list_chkpt_index_files`, if None, checks the file system directly
     """
     possible_fns = [
-        "%s/%s.%03d.index" % (model_dir.get_path(), model_name, epoch),
-        "%s/%s.pretrain.%03d.index" % (model_dir.get_path(), model_name, epoch)]
-    for fn in possible_fns:
-        if os.path.exists(fn):
-            return True
-    return False
+        "%s.%03d.index" % (model_name, epoch),
+        "%s.pretrain.%03d.index" % (model_name, epoch)]
+    if existing_files is not None:
+        return any(fn in existing_files for fn in possible_fns)
+    model_path = model_dir.get_path()
+    return any(os.path.exists(os.path.join(model_path, fn)) for fn in possible_fns)
 
 
 def default_returnn_keep_epochs(num_epochs: int) -> Set[int]: